@@ -1,29 +1,35 @@
-from pydantic_settings import BaseSettings
-import os
+from functools import cache
+from typing import Optional
 
-print(f"app_config_path={os.getcwd()}")  # Ensure this points to the directory containing the .env file
 
-class AppConfig(BaseSettings):
-    APP_NAME: str = "universal-disk-explorer"
-    DEBUG: bool = False
-    FFMPEG_PATH: str
-    FFPROBE_PATH: str
-
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+@cache
+def get_config():
+    """Load the configuration once; later calls return the cached instance.
 
+    pydantic_settings is imported here rather than at module level so that
+    importing this module does not pay the pydantic import cost.
+    """
+    from pydantic_settings import BaseSettings
 
-_config = None  # Private variable to hold the cached instance
+    class AppConfig(BaseSettings):
+        APP_NAME: str = "universal-disk-explorer"
+        DEBUG: bool = False
+        FFMPEG_PATH: str
+        FFPROBE_PATH: str
+        # Files larger than this are fingerprinted instead of fully hashed; unset hashes everything
+        MAX_HASH_BYTES: Optional[int] = None
+        # Content hashes kept in the persistent hash cache; a scan raises it to its file count
+        HASH_CACHE_MAX_ENTRIES: int = 1_000_000
+        # Videos analyzed at once during a scan; unset uses half the CPU count
+        VIDEO_CONCURRENCY: Optional[int] = None
 
+        class Config:
+            env_file = ".env"
+            env_file_encoding = "utf-8"
+            case_sensitive = False
 
-def get_config():
-    global _config
-    if _config is None:
-        try:
-            _config = AppConfig()  # Create and cache the configuration
-        except Exception as e:
-            print(f"Error loading configuration: {e}")
-            raise
-    return _config
+    try:
+        return AppConfig()
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+        raise
@@ -1,4 +1,7 @@
+import os
 import shutil
+import stat
+from collections import defaultdict
 from pathlib import Path
 import send2trash
 from typing import List, Union, Dict
@@ -8,37 +11,118 @@ class FileOperations:
     @staticmethod
     async def delete_files(files: List[str], delete_permanently: bool = True) -> Dict[str, str]:
         """Delete multiple files with optional permanent deletion"""
+        return await asyncio.to_thread(FileOperations._delete_batch_sync, files, delete_permanently)
+
+    @staticmethod
+    def _delete_batch_sync(files: List[str], delete_permanently: bool) -> Dict[str, str]:
+        """Blocking implementation of delete_files, run as a single executor task"""
         results = {}
+        to_delete = []
         for file_path in files:
             path = Path(file_path)
             try:
                 if path.is_file():
-                    if delete_permanently:
-                        path.unlink()  # Permanent deletion
-                        results[str(path)] = "deleted permanently"
-                    else:
-                        send2trash.send2trash(str(path))  # Send to Recycle Bin
-                        results[str(path)] = "moved to Recycle Bin"
+                    results[str(path)] = None  # Keep the caller's ordering in the result
+                    to_delete.append(path)
                 else:
                     results[str(path)] = "not a file"
             except Exception as e:
                 results[str(path)] = f"error: {str(e)}"
+
+        if delete_permanently:
+            results.update(FileOperations._unlink_files(to_delete))
+        else:
+            results.update(FileOperations._trash_files(to_delete))
+        return results
+
+    @staticmethod
+    def _unlink_files(paths: List[Path]) -> Dict[str, str]:
+        """Permanently delete files, resolving each parent directory only once"""
+        results = {}
+        by_parent = defaultdict(list)
+        for path in paths:
+            by_parent[path.parent].append(path)
+
+        use_dir_fd = os.unlink in os.supports_dir_fd
+        for parent, children in by_parent.items():
+            dir_fd = None
+            if use_dir_fd:
+                try:
+                    dir_fd = os.open(parent, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+                except OSError:
+                    dir_fd = None
+            try:
+                for path in children:
+                    try:
+                        if dir_fd is None:
+                            path.unlink()
+                        else:
+                            os.unlink(path.name, dir_fd=dir_fd)
+                        results[str(path)] = "deleted permanently"
+                    except Exception as e:
+                        results[str(path)] = f"error: {str(e)}"
+            finally:
+                if dir_fd is not None:
+                    os.close(dir_fd)
         return results
 
+    @staticmethod
+    def _trash_files(paths: List[Path]) -> Dict[str, str]:
+        """Send files to the Recycle Bin in a single shell operation"""
+        if not paths:
+            return {}
+        try:
+            send2trash.send2trash([str(path) for path in paths])
+            return {str(path): "moved to Recycle Bin" for path in paths}
+        except Exception:
+            # A single bad path fails the whole batch; retry the remaining files
+            # one by one so every path gets its own status.
+            results = {}
+            for path in paths:
+                try:
+                    if path.exists():
+                        send2trash.send2trash(str(path))
+                    results[str(path)] = "moved to Recycle Bin"
+                except Exception as e:
+                    results[str(path)] = f"error: {str(e)}"
+            return results
+
     @staticmethod
     async def move_files(files: List[Union[str, Path]], target_dir: Union[str, Path]) -> Dict[str, str]:
         """Move multiple files to target directory"""
+        return await asyncio.to_thread(FileOperations._move_batch_sync, files, target_dir)
+
+    @staticmethod
+    def _move_batch_sync(files: List[Union[str, Path]], target_dir: Union[str, Path]) -> Dict[str, str]:
+        """Blocking implementation of move_files, run as a single executor task"""
         target = Path(target_dir)
         if not target.exists():
             target.mkdir(parents=True)
             
+        # Same-device moves are tried as a single rename(2); shutil.move is used
+        # across filesystems and whenever the rename fails (bind mounts,
+        # overlay filesystems, an existing directory at the target name).
+        target_dev = target.stat().st_dev
+
         results = {}
         for file_path in files:
             path = Path(file_path)
             try:
-                if path.is_file():
+                try:
+                    file_stat = path.stat()
+                except (FileNotFoundError, NotADirectoryError):
+                    file_stat = None
+                if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
                     new_path = target / path.name
-                    await asyncio.to_thread(shutil.move, str(path), str(new_path))
+                    moved = False
+                    if file_stat.st_dev == target_dev:
+                        try:
+                            os.rename(path, new_path)
+                            moved = True
+                        except OSError:
+                            pass
+                    if not moved:
+                        shutil.move(str(path), str(new_path))
                     results[str(path)] = str(new_path)
                 else:
                     results[str(path)] = "not a file"
@@ -1,24 +1,170 @@
 import os
+import stat
 import asyncio
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Set, AsyncGenerator, Dict, Any, Optional, Union
+from typing import List, Set, AsyncGenerator, Dict, Any, Optional, Union, Tuple, BinaryIO, Iterator
 from concurrent.futures import ThreadPoolExecutor
 import hashlib
-import aiofiles
+import heapq
+import itertools
+import mmap
 import magic
-import json
+import orjson
 import logging
+import time
 import fnmatch
+import re
+import sqlite3
+import threading
+from collections import defaultdict
 from ..models.schemas import FileMetadata, ProgressModel
 from pydantic import BaseModel
 from ..app_config import get_config
 from .video import VideoAnalyzer
+from .stat_cache import StatCache
+
+try:
+    import blake3  # Optional: SIMD/multi-lane content hash, much faster than MD5
+except ImportError:
+    blake3 = None
 
 logger = logging.getLogger(__name__)
 
 config = get_config()  # The same cached instance will be returned
 
+# Files smaller than this are read directly; mapping them costs more than the copy
+MMAP_MIN_SIZE = 64 * 1024
+
+# Files at least this large are hashed by BLAKE3's multithreaded tree mode; below
+# it the thread handoff costs more than it saves, and other files keep cores busy
+MULTITHREAD_HASH_SIZE = 64 * 1024 * 1024
+
+# Readahead hint for mappings hashed front to back (not available on every platform)
+_MADV_SEQUENTIAL = getattr(mmap, 'MADV_SEQUENTIAL', None)
+
+# Files smaller than this are hashed without the hash cache; reading and hashing
+# them costs less than the cache lookup and the write that follows a miss
+HASH_CACHE_MIN_SIZE = 1024 * 1024
+
+# Bytes hashed to tell apart same-sized files before hashing them in full
+PREFIX_HASH_SIZE = 64 * 1024
+
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv'})
+
+# Bound once for the per-file metadata path
+_fromtimestamp = datetime.fromtimestamp
+_md5 = hashlib.md5
+
+# Empty files need neither hashing nor sniffing
+EMPTY_FILE_HASH = (blake3.blake3(b'') if blake3 is not None else _md5(b'')).hexdigest()
+EMPTY_MIME_TYPE = 'inode/x-empty'
+
+# Bytes of the file header handed to libmagic; its magic tests look no further in practice
+MIME_SNIFF_SIZE = 64 * 1024
+
+# Leading bytes that, with the extension, key the shared MIME cache; most files of
+# one type share their signature, so they skip libmagic after the first
+MIME_SIGNATURE_SIZE = 4096
+MIME_CACHE_MAX_ENTRIES = 65536
+
+# Bytes read from each end of a file that is fingerprinted instead of hashed in full
+FINGERPRINT_SPAN = 1024 * 1024
+
+# libmagic loads its whole signature database when a cookie is created and the
+# cookies are not thread-safe, so each worker thread keeps its own instance.
+_magic_local = threading.local()
+
+
+def _get_mime_detector() -> magic.Magic:
+    """Return the calling thread's cached libmagic MIME detector."""
+    detector = getattr(_magic_local, 'detector', None)
+    if detector is None:
+        detector = _magic_local.detector = magic.Magic(mime=True)
+    return detector
+
+
+# Small bounded reads (prefixes, small files) go through one reusable buffer per
+# worker thread instead of allocating a fresh bytes object per file
+_read_buffer_local = threading.local()
+
+
+def _read_up_to(f: BinaryIO, size: int) -> memoryview:
+    """
+    Read up to `size` bytes of an open file into the calling thread's buffer.
+
+    The returned view is only valid until the thread's next call.
+    """
+    buffer = getattr(_read_buffer_local, 'buffer', None)
+    if buffer is None:
+        buffer = _read_buffer_local.buffer = memoryview(bytearray(max(MMAP_MIN_SIZE, PREFIX_HASH_SIZE)))
+    if size > len(buffer):
+        return memoryview(f.read(size))
+    view = buffer[:size]
+    filled = 0
+    while filled < size:
+        count = f.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return view[:filled]
+
+
+def _file_suffix(name: str) -> str:
+    """Return the extension of a file name, matching Path.suffix without building a Path."""
+    i = name.rfind('.')
+    return name[i:] if 0 < i < len(name) - 1 else ''
+
+
+# MIME types of common extensions; these files skip libmagic content sniffing
+EXTENSION_MIME_TYPES = {
+    '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.gif': 'image/gif',
+    '.webp': 'image/webp', '.bmp': 'image/bmp', '.tif': 'image/tiff', '.tiff': 'image/tiff',
+    '.heic': 'image/heic', '.svg': 'image/svg+xml', '.ico': 'image/vnd.microsoft.icon',
+    '.mp4': 'video/mp4', '.m4v': 'video/x-m4v', '.mov': 'video/quicktime', '.mkv': 'video/x-matroska',
+    '.avi': 'video/x-msvideo', '.wmv': 'video/x-ms-wmv', '.flv': 'video/x-flv', '.webm': 'video/webm',
+    '.mp3': 'audio/mpeg', '.wav': 'audio/x-wav', '.flac': 'audio/flac', '.aac': 'audio/aac',
+    '.m4a': 'audio/mp4', '.ogg': 'audio/ogg',
+    '.pdf': 'application/pdf', '.zip': 'application/zip', '.gz': 'application/gzip',
+    '.tar': 'application/x-tar', '.7z': 'application/x-7z-compressed', '.rar': 'application/x-rar',
+    '.doc': 'application/msword', '.xls': 'application/vnd.ms-excel',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain', '.md': 'text/plain', '.csv': 'text/csv', '.html': 'text/html',
+    '.htm': 'text/html', '.css': 'text/css', '.js': 'text/javascript', '.json': 'application/json',
+    '.xml': 'text/xml', '.py': 'text/x-script.python',
+}
+
+
+def _detect_mime_type(head: bytes) -> str:
+    """Detect the MIME type of a file header using the thread's cached detector."""
+    return _get_mime_detector().from_buffer(head)
+
+
+# (suffix, signature digest) -> MIME type, shared by all worker threads
+_mime_cache: Dict[Tuple[str, bytes], str] = {}
+
+
+def _sniff_mime_type(f: BinaryIO, suffix: str) -> str:
+    """
+    Detect the MIME type of an open file, reusing the result for earlier files
+    with the same extension and the same first MIME_SIGNATURE_SIZE bytes.
+
+    Only cache misses read the rest of the MIME_SNIFF_SIZE header.
+    """
+    head = f.read(MIME_SIGNATURE_SIZE)
+    key = (suffix, hashlib.blake2b(head, digest_size=16).digest())
+    mime_type = _mime_cache.get(key)
+    if mime_type is None:
+        if len(head) == MIME_SIGNATURE_SIZE:
+            head += f.read(MIME_SNIFF_SIZE - MIME_SIGNATURE_SIZE)
+        mime_type = _detect_mime_type(head)
+        if len(_mime_cache) >= MIME_CACHE_MAX_ENTRIES:
+            _mime_cache.clear()
+        _mime_cache[key] = mime_type
+    return mime_type
+
 class FileScanner:
     def __init__(
         self,
@@ -26,22 +172,66 @@ class FileScanner:
         result_file: str,
         max_workers: Optional[int] = None,
         chunk_size: int = 8192,
-        video_analyzer: Optional[VideoAnalyzer] = None
+        video_analyzer: Optional[VideoAnalyzer] = None,
+        progress_interval: float = 0.25,
+        walk_workers: int = 32,
+        max_hash_bytes: Optional[int] = None,
+        hash_cache_path: Optional[str] = None,
+        hash_cache_max_entries: int = 1_000_000
     ):
-        self.max_workers = max_workers or min(4, os.cpu_count())
+        # The per-file work (stat, open, read, libmagic) is I/O bound, so size the pool well past the core count
+        self.max_workers = max_workers or min(64, (os.cpu_count() or 4) * 8)
         self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._file_semaphore = asyncio.Semaphore(self.max_workers * 8)  # Files processed at once
         self.chunk_size = chunk_size
+        self.walk_workers = walk_workers  # Threads listing directories in parallel
+        # Files larger than this are fingerprinted rather than hashed in full; None hashes everything
+        self.max_hash_bytes = max_hash_bytes
+        # Full content hashes of unchanged files are reused from here across scans;
+        # one table per algorithm so an installed/removed blake3 never mixes digests.
+        # A scan grows max_entries to its file count, so a tree larger than the
+        # limit is not evicted before it is rescanned.
+        self.hash_cache = (
+            StatCache(
+                hash_cache_path,
+                'content_hash_blake3' if blake3 is not None else 'content_hash_md5',
+                max_entries=hash_cache_max_entries
+            )
+            if hash_cache_path else None
+        )
+        # hash_cache.hits when the current scan started; the cache counts hits under its lock
+        self._cache_hits_at_start = 0
         self.total_files = 0
         self.processed_files = 0
         self.progress_file = Path(progress_file)
         self.result_file = Path(result_file)
         self._scan_start_time = None
         self._last_error = None
-        self.video_analyzer = video_analyzer or VideoAnalyzer(config.FFMPEG_PATH, config.FFPROBE_PATH)
+        self.progress_interval = progress_interval  # Minimum seconds between progress file writes
+        self._last_progress_write = 0.0
+        self.video_analyzer = video_analyzer or VideoAnalyzer(
+            config.FFMPEG_PATH, config.FFPROBE_PATH, config.VIDEO_CONCURRENCY
+        )
         
         # Initialize files
         self._initialize_files()
 
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the scanner's I/O thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    @property
+    def cached_hashes(self) -> int:
+        """Hashes reused from hash_cache since the current scan started."""
+        if self.hash_cache is None:
+            return 0
+        return self.hash_cache.hits - self._cache_hits_at_start
+
+    def close(self) -> None:
+        """Write the hash cache's buffered entries and close it."""
+        if self.hash_cache is not None:
+            self.hash_cache.close()
+
     def _initialize_files(self):
         """Initialize progress and result files if they don't exist."""
         # Create parent directories if they don't exist
@@ -50,70 +240,379 @@ class FileScanner:
         
         # Initialize progress file if it doesn't exist
         if not self.progress_file.exists():
-            self.update_progress()
+            self.update_progress(force=True)
         
         # Initialize results file if it doesn't exist
         if not self.result_file.exists():
-            self.result_file.write_text("[\n]")        
-            self.result_file.write_text("[\n]")
+            self.result_file.touch()
 
-    def _serialize_model(self, obj: Union[dict, BaseModel]) -> dict:
-        """Serialize Pydantic models or dictionaries to JSON-compatible dict."""
+    @staticmethod
+    def _serialize_result(obj: Union[dict, BaseModel]) -> bytes:
+        """Serialize a Pydantic model or dictionary to one JSON Lines record."""
         if isinstance(obj, BaseModel):
-            return obj.model_dump(exclude_unset=True)
-        return obj    
+            # Pydantic's own serializer skips building an intermediate dict
+            return obj.model_dump_json().encode() + b'\n'
+        return orjson.dumps(obj, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+
+    @staticmethod
+    def _hash_file(f: BinaryIO) -> str:
+        """
+        Blocking content hash of an open file, read from the start.
+
+        Uses BLAKE3 over a read-only memory map when the blake3 package is
+        installed (multithreaded for very large files), otherwise MD5 via
+        hashlib.file_digest.
+        """
+        if blake3 is None:
+            return hashlib.file_digest(f, 'md5').hexdigest()
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_SIZE:
+            return blake3.blake3(_read_up_to(f, MMAP_MIN_SIZE)).hexdigest()
+        max_threads = blake3.blake3.AUTO if size >= MULTITHREAD_HASH_SIZE else 1
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if max_threads == 1 and _MADV_SEQUENTIAL is not None:
+                # Single-threaded hashing walks the mapping in order; let the
+                # kernel read ahead aggressively and drop pages behind it
+                mm.madvise(_MADV_SEQUENTIAL)
+            return blake3.blake3(mm, max_threads=max_threads).hexdigest()
+
+    @staticmethod
+    def _fingerprint_file(f: BinaryIO) -> str:
+        """
+        Blocking fingerprint of a large open file: its size plus the first and last
+        FINGERPRINT_SPAN bytes. Prefixed with 'fp:' so it never equals a full hash.
+        """
+        size = os.fstat(f.fileno()).st_size
+        digest = blake3.blake3() if blake3 is not None else _md5()
+        digest.update(size.to_bytes(8, 'little'))
+        digest.update(_read_up_to(f, FINGERPRINT_SPAN))
+        if size > FINGERPRINT_SPAN:
+            f.seek(max(size - FINGERPRINT_SPAN, FINGERPRINT_SPAN))
+            digest.update(_read_up_to(f, FINGERPRINT_SPAN))
+        return 'fp:' + digest.hexdigest()
+
+    def _content_hash_func(self, size: int):
+        """Pick the blocking hash function for a file of the given size."""
+        if self.max_hash_bytes is not None and size > self.max_hash_bytes:
+            return self._fingerprint_file
+        return self._hash_file
+
+    @staticmethod
+    def _hash_prefix(f: BinaryIO, size: int = PREFIX_HASH_SIZE) -> str:
+        """
+        Blocking hash of the first `size` bytes of an open file, using the same algorithm
+        as _hash_file so that it equals the full hash for files no larger than `size`.
+        """
+        data = _read_up_to(f, size)
+        digest = blake3.blake3(data) if blake3 is not None else _md5(data)
+        return digest.hexdigest()
+
+    def _hash_open_file(self, hash_func, path: Union[str, Path], f: BinaryIO) -> str:
+        """
+        Run a blocking hash function over an open file, reusing the full hash stored
+        in hash_cache while the file's size and mtime are unchanged.
 
-    async def compute_file_hash(self, path: Path) -> Optional[str]:
-        """Compute MD5 hash of a file."""
+        The file is stat'ed through its descriptor, so the entry always describes
+        the contents that were hashed. Fingerprints are never cached.
+        """
+        if self.hash_cache is None or hash_func is not self._hash_file:
+            return hash_func(f)
+        file_stat = os.fstat(f.fileno())
+        if file_stat.st_size < HASH_CACHE_MIN_SIZE:
+            return hash_func(f)
+        path = os.fspath(path)
+        try:
+            digest = self.hash_cache.get(path, file_stat)
+        except sqlite3.Error as e:
+            # A locked or full cache database only costs the saved work
+            logger.warning(f"Hash cache lookup failed for {path}: {str(e)}")
+            return hash_func(f)
+        if digest is not None:
+            return digest
+        digest = hash_func(f)
         try:
-            hash_md5 = hashlib.md5()
-            async with aiofiles.open(path, 'rb') as f:
-                while chunk := await f.read(self.chunk_size):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            self.hash_cache.put(path, file_stat, digest)
+        except sqlite3.Error as e:
+            logger.warning(f"Hash cache write failed for {path}: {str(e)}")
+        return digest
+
+    def _open_and_hash(self, hash_func, path: Union[str, Path]) -> str:
+        """Open a file and run a blocking hash function over it."""
+        with open(path, 'rb') as f:
+            return self._hash_open_file(hash_func, path, f)
+
+    def _analyze_file(self, path: str, suffix: str, sniff_mime: bool, hash_func) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Blocking per-file kernel: sniff the MIME type from the header and/or hash
+        the contents with one open and one trip to the thread pool.
+
+        Returns:
+            (MIME type or None if not sniffed, hash or None if not requested or failed)
+        """
+        with open(path, 'rb') as f:
+            mime_type = None
+            if sniff_mime:
+                mime_type = _sniff_mime_type(f, suffix)
+                f.seek(0)
+            if hash_func is None:
+                return mime_type, None
+            try:
+                return mime_type, self._hash_open_file(hash_func, path, f)
+            except OSError as e:
+                logger.error(f"Error computing hash for {path}: {str(e)}")
+                return mime_type, None
+
+    async def _bounded_hash(self, hash_func, path: Union[str, Path]) -> Optional[str]:
+        """Run a blocking hash function in a thread, bounded by the file semaphore."""
+        try:
+            async with self._file_semaphore:
+                return await self._run_blocking(self._open_and_hash, hash_func, path)
         except (PermissionError, FileNotFoundError, OSError) as e:
             logger.error(f"Error computing hash for {path}: {str(e)}")
             return None
 
-    async def get_file_metadata(self, path: Path, include_hash: bool = True, generate_video_screenshots: bool = True) -> Optional[FileMetadata]:
-        """Get detailed file metadata."""
+    async def _group_duplicates(
+        self,
+        files: List[FileMetadata],
+        prefix_tasks: Optional[Dict[str, asyncio.Task]] = None
+    ) -> Dict[str, List[FileMetadata]]:
+        """
+        Group files with identical content by hash.
+
+        Files are bucketed by size first, and only files sharing a size have their
+        first PREFIX_HASH_SIZE bytes hashed; only files whose prefixes also collide
+        are hashed in full. Files with a unique size are never read.
+
+        Args:
+            files: Files to group
+            prefix_tasks: Prefix hashes already started, by path
+        """
+        prefix_tasks = prefix_tasks or {}
+        by_size = defaultdict(list)
+        for metadata in files:
+            by_size[metadata.size].append(metadata)
+
+        by_prefix = defaultdict(list)
+        for group in by_size.values():
+            if len(group) < 2:
+                continue
+            prefixes = await asyncio.gather(*(
+                prefix_tasks.get(m.path) or self._bounded_hash(self._hash_prefix, m.path) for m in group
+            ))
+            for metadata, prefix in zip(group, prefixes):
+                if prefix is not None:
+                    by_prefix[(metadata.size, prefix)].append(metadata)
+
+        duplicates = defaultdict(list)
+        for (size, prefix), group in by_prefix.items():
+            if len(group) < 2:
+                continue
+            if size <= PREFIX_HASH_SIZE:
+                hashes = [prefix] * len(group)  # The prefix already covers the whole file
+            else:
+                hash_func = self._content_hash_func(size)
+                hashes = await asyncio.gather(*(self._bounded_hash(hash_func, m.path) for m in group))
+            for metadata, file_hash in zip(group, hashes):
+                if file_hash is not None:
+                    metadata.hash = file_hash
+                    duplicates[file_hash].append(metadata)
+
+        return {file_hash: group for file_hash, group in duplicates.items() if len(group) > 1}
+
+    async def get_file_metadata(
+        self,
+        path: Union[str, Path],
+        include_hash: bool = True,
+        generate_video_screenshots: bool = True,
+        file_stat: Optional[os.stat_result] = None
+    ) -> Optional[FileMetadata]:
+        """
+        Get detailed file metadata.
+
+        Args:
+            path: Path of the file
+            include_hash: Whether to compute the file hash
+            generate_video_screenshots: Whether to generate screenshots for video files
+            file_stat: Stat result already taken during the directory walk, if any
+        """
+        path = os.fspath(path)
         try:
-            stat = path.stat()
-            mime = magic.Magic(mime=True)
-
-            metadata = FileMetadata(
-                path=str(path),
-                name=path.name,
-                size=stat.st_size,
-                created_time=datetime.fromtimestamp(stat.st_ctime),
-                modified_time=datetime.fromtimestamp(stat.st_mtime),
-                file_type=path.suffix.lower(),
-                mime_type=await asyncio.to_thread(mime.from_file, str(path)),
-                is_directory=path.is_dir(),
+            if file_stat is None:
+                file_stat = os.stat(path)
+            name = os.path.basename(path)
+            file_type = _file_suffix(name).lower()
+
+            size = file_stat.st_size
+            is_directory = stat.S_ISDIR(file_stat.st_mode)
+
+            # Resolve common extensions from the table and only sniff content for the rest
+            mime_type = EXTENSION_MIME_TYPES.get(file_type)
+            if mime_type is None and size == 0:
+                mime_type = EMPTY_MIME_TYPE
+            sniff_mime = mime_type is None
+
+            file_hash = None
+            hash_func = None
+            if include_hash and not is_directory:
+                if size == 0:
+                    file_hash = EMPTY_FILE_HASH
+                else:
+                    hash_func = self._content_hash_func(size)
+
+            if sniff_mime or hash_func is not None:
+                try:
+                    sniffed, digest = await self._run_blocking(self._analyze_file, path, file_type, sniff_mime, hash_func)
+                except OSError as e:
+                    if sniff_mime:
+                        raise
+                    # The MIME type came from the extension, so keep the file without a hash
+                    logger.error(f"Error computing hash for {path}: {str(e)}")
+                    sniffed, digest = None, None
+                mime_type = sniffed or mime_type
+                file_hash = digest or file_hash
+
+            # Every field comes straight from stat and the scanner with its final type,
+            # so the per-file model is built without running Pydantic validation
+            metadata = FileMetadata.model_construct(
+                path=path,
+                name=name,
+                size=size,
+                created_time=_fromtimestamp(file_stat.st_ctime),
+                modified_time=_fromtimestamp(file_stat.st_mtime),
+                file_type=file_type,
+                mime_type=mime_type,
+                is_directory=is_directory,
                 video_metadata=None
             )
 
-            if not metadata.is_directory and include_hash:
-                metadata.hash = await self.compute_file_hash(path)
+            if include_hash and not is_directory:
+                metadata.hash = file_hash
 
             # Check if it's a video file
-            video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv'}
-            if metadata.file_type.lower() in video_extensions:
+            if file_type in VIDEO_EXTENSIONS:
                 metadata.video_metadata = await self.video_analyzer.get_video_metadata(
-                    path, generate_screenshots=generate_video_screenshots
+                    path, generate_screenshots=generate_video_screenshots, file_stat=file_stat
                 )
 
-            self.processed_files += 1
-            self.update_progress()
-
             return metadata
 
         except (PermissionError, FileNotFoundError, OSError) as e:
             logger.error(f"Error getting metadata for {path}: {str(e)}")
-            self.processed_files += 1
-            self.update_progress()
             return None
 
+    @staticmethod
+    def _compile_patterns(patterns: Set[str]) -> Optional[re.Pattern]:
+        """
+        Combine glob patterns into one regex, so each name is matched once.
+
+        Matches like fnmatch.fnmatch, including case-insensitivity on Windows.
+        """
+        if not patterns:
+            return None
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        return re.compile('|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in patterns), flags)
+
+    @staticmethod
+    def _scan_dir(
+        current: str,
+        exclude_dirs: Set[str],
+        exclude_regex: Optional[re.Pattern]
+    ) -> Tuple[List[str], List[Tuple[str, Optional[os.stat_result]]]]:
+        """
+        List one directory with os.scandir.
+
+        The stat result of each file is taken from its DirEntry, which avoids a
+        second path lookup (and is served from the directory listing on Windows).
+
+        Returns:
+            (subdirectories to descend into, (path, stat result) per file to scan);
+            the stat result is None if it failed.
+        """
+        subdirs = []
+        files = []
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.error(f"Error reading directory {current}: {str(e)}")
+            return subdirs, files
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # Prune excluded directories; like os.walk, don't follow symlinked ones
+                if entry.name not in exclude_dirs and not entry.is_symlink():
+                    subdirs.append(entry.path)
+                continue
+
+            # Skip files matching exclude patterns
+            if exclude_regex is not None and exclude_regex.match(entry.name):
+                continue
+
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                file_stat = None  # get_file_metadata will report the error
+            files.append((entry.path, file_stat))
+        return subdirs, files
+
+    def _walk_tree(
+        self,
+        root: str,
+        exclude_dirs: Set[str],
+        exclude_patterns: Set[str]
+    ) -> List[Tuple[str, Optional[os.stat_result]]]:
+        """
+        Walk a directory tree with walk_workers threads listing directories in parallel.
+
+        Workers share a LIFO stack of directories; os.scandir and stat release the
+        GIL, so directory listings overlap, which matters most on network mounts
+        and cold caches.
+
+        Returns:
+            (path, stat result) tuples for every file to scan.
+        """
+        exclude_dirs = frozenset(exclude_dirs)
+        exclude_regex = self._compile_patterns(exclude_patterns)
+        pending_dirs = [root]
+        files = []
+        active = 0  # Directories currently being listed by a worker
+        cond = threading.Condition()
+
+        def worker():
+            nonlocal active
+            while True:
+                with cond:
+                    while not pending_dirs and active:
+                        cond.wait()
+                    if not pending_dirs:
+                        # Nothing queued and nobody listing: the walk is complete
+                        cond.notify_all()
+                        return
+                    current = pending_dirs.pop()
+                    active += 1
+
+                subdirs, found = [], []
+                try:
+                    subdirs, found = self._scan_dir(current, exclude_dirs, exclude_regex)
+                finally:
+                    with cond:
+                        pending_dirs.extend(subdirs)
+                        files.extend(found)
+                        active -= 1
+                        cond.notify_all()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.walk_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return files
+
     async def scan_directory(
         self,
         root_path: str,
@@ -121,7 +620,9 @@ class FileScanner:
         exclude_patterns: Set[str] = None,
         include_hash: bool = True,
         generate_video_screenshots: bool = True,
-        low_quality_videos: bool = False
+        low_quality_videos: bool = False,
+        result_file: Optional[Path] = None,
+        report_progress: bool = False
     ) -> AsyncGenerator[dict, None]:
         """
         Recursively scan a directory and yield file metadata.
@@ -132,6 +633,11 @@ class FileScanner:
             exclude_patterns: Set of file patterns to exclude (e.g., '*.tmp', '.DS_Store')
             include_hash: Whether to compute file hashes
             generate_video_screenshots: Whether to generate screenshots for video files
+            result_file: Result file of this scan, truncated before scanning; the caller
+                writes the yielded metadata to it
+            report_progress: Whether this scan owns the scanner's progress counters and
+                progress file. Helper scans (search, insights, ...) leave them alone so
+                they cannot disturb a running full scan.
         
         Yields:
             Metadata of each file processed.
@@ -147,109 +653,152 @@ class FileScanner:
         if not root.is_dir():
             raise NotADirectoryError(f"Path is not a directory: {root_path}")
 
-        self._scan_start_time = datetime.now()
-        self._last_error = None
+        if report_progress:
+            self._scan_start_time = datetime.now()
+            self._last_error = None
 
-        # Initialize result file (assuming self.result_file is defined)
-        if self.result_file.exists():
-            self.result_file.unlink()
-        self.result_file.write_text("[\n]")  # Initialize with empty JSON array
+        if result_file is not None:
+            Path(result_file).write_bytes(b"")  # Truncate to an empty JSON Lines file
 
         try:
             # Collect files with error handling
-            all_files = []
-            for current_path, dirs, files in os.walk(root):
-                # Skip excluded directories
-                if any(excluded in Path(current_path).parts for excluded in exclude_dirs):
-                    continue
+            all_files = await self._run_blocking(self._walk_tree, str(root), exclude_dirs, exclude_patterns)
+
+            if report_progress:
+                self.total_files = len(all_files)
+                self.processed_files = 0
+                if self.hash_cache is not None:
+                    self._cache_hits_at_start = self.hash_cache.hits
+                    self.hash_cache.max_entries = max(self.hash_cache.max_entries, len(all_files))
+                self.update_progress(force=True)
+
+            # Process files concurrently; the semaphore caps how many files are open
+            # (hash reads, libmagic, ffprobe) at once, and results are yielded as
+            # soon as each file finishes instead of waiting for a whole chunk.
+            # Only a bounded window of tasks exists at a time, refilled from the
+            # file list as tasks finish, so huge trees don't create a task per file
+            # up front.
+            async def bounded_metadata(path, file_stat):
+                async with self._file_semaphore:
+                    return await self.get_file_metadata(path, include_hash, generate_video_screenshots, file_stat)
+
+            window = self.max_workers * 16
+            files = iter(all_files)
+            pending = set()
+            try:
+                while True:
+                    for path, file_stat in itertools.islice(files, window - len(pending)):
+                        pending.add(asyncio.create_task(bounded_metadata(path, file_stat)))
+                    if not pending:
+                        break
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            result = task.result()
+                        except Exception as e:
+                            logger.error(f"Error processing file: {str(e)}")
+                            result = None
+                        if report_progress:
+                            self.processed_files += 1
+                            self.update_progress()
+                        if result:
+                            yield result
+            finally:
+                # Don't leave work running if the consumer stops iterating early
+                for task in pending:
+                    task.cancel()
+
+            if include_hash and self.hash_cache is not None:
+                # Write the hashes still buffered, so they survive a crash before the next flush
+                try:
+                    await self._run_blocking(self.hash_cache.flush)
+                except sqlite3.Error as e:
+                    logger.warning(f"Hash cache flush failed: {str(e)}")
 
-                for file in files:
-                    full_path = Path(current_path) / file
-                    
-                    # Skip files matching exclude patterns
-                    if any(fnmatch.fnmatch(full_path.name, pattern) for pattern in exclude_patterns):
-                        continue
-                    
-                    all_files.append(full_path)
-
-            self.total_files = len(all_files)
-            self.processed_files = 0
-            self.update_progress()
-
-            # Process files concurrently in chunks
-            chunk_size = min(1000, max(100, self.total_files // 10))
-            for i in range(0, len(all_files), chunk_size):
-                chunk = all_files[i:i + chunk_size]
-                tasks = [
-                    self.get_file_metadata(path, include_hash, generate_video_screenshots)
-                    for path in chunk
-                ]
-                chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in chunk_results:
-                    if isinstance(result, Exception):
-                        logger.error(f"Error processing file: {str(result)}")
-                        continue
-                    if result:
-                        yield result
-                        
         except Exception as e:
-            self._last_error = str(e)
+            if report_progress:
+                self._last_error = str(e)
             logger.error(f"Scan failed: {str(e)}", exc_info=True)
             raise
 
-    def update_progress(self) -> None:
-        """Update the progress file with the current state."""
+    def update_progress(self, force: bool = False) -> None:
+        """
+        Update the progress file with the current state.
+
+        Writes are throttled to one per progress_interval seconds while a scan is
+        running; the final state, errors and forced updates are always written.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and not self._last_error
+            and self.processed_files < self.total_files
+            and now - self._last_progress_write < self.progress_interval
+        ):
+            return
+        self._last_progress_write = now
+
         progress = self.get_progress()
         try:
             # Ensure the directory exists
             Path(self.progress_file).parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress, f, indent=2)
+
+            # Write to a temporary file and swap it in so readers never see a partial file
+            tmp_file = self.progress_file.with_name(self.progress_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(progress, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_file, self.progress_file)
         except Exception as e:
             logger.error(f"Error updating progress file: {str(e)}")
 
     def write_results(self, results: list, result_file: Optional[Path] = None, append: bool = False) -> None:
-        """Write scan results to the result file."""
+        """
+        Write scan results to the result file as JSON Lines (one JSON object per line).
+
+        With append=True the records are added to the end of the file, which is
+        O(len(results)) regardless of how much has already been written.
+        """
         file_to_write = result_file if result_file is not None else self.result_file
         if not results:
             return
         try:
-            if not file_to_write.exists():
-                file_to_write.write_text("[\n]")
-            # Convert all results to JSON-serializable dictionaries
-            serialized_results = [self._serialize_model(result) for result in results]
-            if append:
-                content = file_to_write.read_text()
-                if content.strip() == '':
-                    content = '[\n]'
-                    file_to_write.write_text(content)
-                if content.rstrip().endswith(']'):
-                    content = content.rstrip()[:-1]
-                    if not content.rstrip().endswith('['):
-                        content += ','
-                    content += '\n'
-                    file_to_write.write_text(content)
-                with open(file_to_write, 'a') as f:
-                    for idx, result in enumerate(serialized_results):
-                        json.dump(result, f, default=str)
-                        if idx < len(serialized_results) - 1:
-                            f.write(',\n')
-                    f.write('\n]')
-            else:
-                with open(file_to_write, 'w') as f:
-                    f.write('[\n')
-                    for idx, result in enumerate(serialized_results):
-                        json.dump(result, f, default=str)
-                        if idx < len(serialized_results) - 1:
-                            f.write(',\n')
-                        else:
-                            f.write('\n]')
+            with open(file_to_write, 'ab' if append else 'wb') as f:
+                f.writelines(self._serialize_result(result) for result in results)
         except Exception as e:
             logger.error(f"Error writing results: {str(e)}")
             self._last_error = f"Failed to write results: {str(e)}"
 
+    @staticmethod
+    def iter_results_json(result_file: Path, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        """
+        Yield a result file as the bytes of one JSON array, in chunks of about chunk_size.
+
+        JSON Lines records are joined as-is rather than decoded and re-encoded;
+        JSON array files from older versions are passed through unchanged. A last
+        line without a newline is a record still being written and is skipped.
+        """
+        with open(result_file, 'rb') as f:
+            if Path(result_file).suffix == '.json':
+                while chunk := f.read(chunk_size):
+                    yield chunk
+                return
+            chunk = bytearray(b'[')
+            separator = b''
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                chunk += separator
+                chunk += line
+                separator = b','
+                if len(chunk) >= chunk_size:
+                    yield bytes(chunk)
+                    chunk.clear()
+            chunk += b']'
+            yield bytes(chunk)
+
     def get_progress(self) -> Dict[str, Any]:
         """Get detailed scanning progress."""
         progress_percentage = round((self.processed_files / self.total_files * 100), 2) if self.total_files else 0
@@ -275,6 +824,9 @@ class FileScanner:
                 progress_data["estimated_time_remaining"] = str(timedelta(seconds=int(eta_seconds)))
                 progress_data["files_per_second"] = round(files_per_second, 2)
 
+        if self.hash_cache is not None:
+            progress_data["cached_hashes"] = self.cached_hashes
+
         # Handle error and completion statuses
         if self._last_error:
             progress_data["status"] = "error"
@@ -284,7 +836,7 @@ class FileScanner:
 
         # Create ProgressModel and return its dictionary representation
         progress_model = ProgressModel(**progress_data)
-        return progress_model.model_dump()
+        return progress_model.model_dump(mode='json')
     
     async def search_directory_with_filters(
         self,
@@ -298,16 +850,28 @@ class FileScanner:
         low_quality_videos: bool = False,
         top_n: Optional[int] = None,
         include_duplicates: bool = False,
-        preview_image: bool = True
+        preview_image: bool = True,
+        report_progress: bool = False
     ):
         """
         Perform a background scan with filters and save results to a file.
+
+        result_file is created empty when the scan starts and holds the matches once
+        it finishes; report_progress is passed on to scan_directory.
         """
         # Initialize results list
         results = []
+        seq = 0
 
         # Scan the directory and apply filters
-        async for metadata in self.scan_directory(root_path,None,None,False,preview_image,low_quality_videos):
+        async for metadata in self.scan_directory(
+            root_path,
+            include_hash=False,
+            generate_video_screenshots=preview_image,
+            low_quality_videos=low_quality_videos,
+            result_file=result_file,
+            report_progress=report_progress
+        ):
             # Apply size filter
             if min_size is not None and metadata.size < min_size:
                 continue
@@ -328,27 +892,30 @@ class FileScanner:
             if low_quality_videos and metadata.video_metadata and not metadata.video_metadata.is_low_quality:
                 continue
 
-            # Add to results
-            results.append(metadata.dict())
+            # Add to results; with top N only a bounded heap of the N largest is kept
+            if not top_n:
+                results.append(metadata)
+                continue
+            seq += 1
+            # Among equal sizes the later file is evicted first, matching a stable sort
+            entry = (metadata.size, -seq, metadata)
+            if len(results) < top_n:
+                heapq.heappush(results, entry)
+            else:
+                heapq.heappushpop(results, entry)
 
         # Apply top N filter
         if top_n:
-            results = sorted(results, key=lambda x: x["size"], reverse=True)[:top_n]
+            results = [entry[2] for entry in sorted(results, key=lambda x: (-x[0], -x[1]))]
 
         # Apply duplicate filter (if needed)
         if include_duplicates:
-            # Group files by hash
-            hash_map = {}
-            for file in results:
-                if file["hash"] not in hash_map:
-                    hash_map[file["hash"]] = []
-                hash_map[file["hash"]].append(file)
-
-            # Only include files with duplicates
-            results = [file for files in hash_map.values() if len(files) > 1 for file in files]
+            # Only include files with duplicates; files are hashed only when needed
+            duplicates = await self._group_duplicates(results)
+            results = [file for files in duplicates.values() for file in files]
 
         # Write results to the result file
-        self.write_results(results, result_file)
+        await self._run_blocking(self.write_results, results, result_file)
 
     async def get_insights(self, root_path: str) -> dict:
         """
@@ -357,11 +924,13 @@ class FileScanner:
         total_size = 0
         file_count = 0
         file_type_count = {}
-        largest_files = []
-        oldest_files = []
+        # Bounded heaps of (key, -seq, metadata); seq breaks ties without comparing models,
+        # and its sign makes the later of two equal files the one evicted, as a stable sort would
+        largest_heap = []
+        oldest_heap = []
         low_quality_videos = []
 
-        async for metadata in self.scan_directory(root_path):
+        async for metadata in self.scan_directory(root_path, include_hash=False, generate_video_screenshots=False):
             total_size += metadata.size
             file_count += 1
 
@@ -370,44 +939,66 @@ class FileScanner:
             file_type_count[file_type] = file_type_count.get(file_type, 0) + 1
 
             # Track largest files
-            largest_files.append(metadata.dict())
-            if len(largest_files) > 10:
-                largest_files = sorted(largest_files, key=lambda x: x["size"], reverse=True)[:10]
+            entry = (metadata.size, -file_count, metadata)
+            if len(largest_heap) < 10:
+                heapq.heappush(largest_heap, entry)
+            else:
+                heapq.heappushpop(largest_heap, entry)
 
             # Track oldest files
-            oldest_files.append(metadata.dict())
-            if len(oldest_files) > 10:
-                oldest_files = sorted(oldest_files, key=lambda x: x["modified_time"])[:10]
+            entry = (-metadata.modified_time.timestamp(), -file_count, metadata)
+            if len(oldest_heap) < 10:
+                heapq.heappush(oldest_heap, entry)
+            else:
+                heapq.heappushpop(oldest_heap, entry)
 
             # Track low-quality videos
             if metadata.video_metadata and metadata.video_metadata.is_low_quality:
-                low_quality_videos.append(metadata.dict())
+                low_quality_videos.append(metadata)
+
+        largest_files = sorted(largest_heap, key=lambda x: (-x[0], -x[1]))
+        oldest_files = sorted(oldest_heap, key=lambda x: (-x[0], -x[1]))
 
         return {
             "total_size": total_size,
             "file_count": file_count,
             "file_type_count": file_type_count,
-            "largest_files": sorted(largest_files, key=lambda x: x["size"], reverse=True)[:10],
-            "oldest_files": sorted(oldest_files, key=lambda x: x["modified_time"])[:10],
-            "low_quality_videos": low_quality_videos,
+            "largest_files": [entry[2].model_dump() for entry in largest_files],
+            "oldest_files": [entry[2].model_dump() for entry in oldest_files],
+            "low_quality_videos": [metadata.model_dump() for metadata in low_quality_videos],
         }
     
     async def find_duplicates(self, root_path: str) -> dict:
         """
         Find duplicate files in a directory.
         """
-        hash_map = {}
-
-        async for metadata in self.scan_directory(root_path):
-            if metadata.hash:
-                if metadata.hash not in hash_map:
-                    hash_map[metadata.hash] = []
-                hash_map[metadata.hash].append(metadata.dict())
-
-        # Filter out non-duplicates
-        duplicates = {hash: files for hash, files in hash_map.items() if len(files) > 1}
+        # Files are bucketed by size as the scan streams in, and a bucket's prefix
+        # hashes start as soon as it holds a second file, overlapping the walk
+        by_size = defaultdict(list)
+        prefix_tasks = {}
+        try:
+            async for metadata in self.scan_directory(root_path, include_hash=False, generate_video_screenshots=False):
+                bucket = by_size[metadata.size]
+                bucket.append(metadata)
+                if len(bucket) < 2:
+                    continue
+                # The second file of a size starts hashing for both; later ones only for themselves
+                for candidate in bucket if len(bucket) == 2 else bucket[-1:]:
+                    prefix_tasks[candidate.path] = asyncio.create_task(
+                        self._bounded_hash(self._hash_prefix, candidate.path)
+                    )
+
+            candidates = [metadata for bucket in by_size.values() if len(bucket) > 1 for metadata in bucket]
+            del by_size  # Drop the unique-size files before the full hashing pass
+            duplicates = await self._group_duplicates(candidates, prefix_tasks)
+        finally:
+            for task in prefix_tasks.values():
+                task.cancel()
 
-        return duplicates
+        return {
+            file_hash: [metadata.model_dump() for metadata in group]
+            for file_hash, group in duplicates.items()
+        }
     
     async def find_aging_files(self, root_path: str, days: int, mode: str) -> List[dict]:
         """
@@ -416,13 +1007,13 @@ class FileScanner:
         aging_files = []
         cutoff_date = datetime.now() - timedelta(days=days)
 
-        async for metadata in self.scan_directory(root_path):
+        async for metadata in self.scan_directory(root_path, include_hash=False, generate_video_screenshots=False):
             if mode == "accessed":
                 last_used = metadata.accessed_time  # Note: You may need to add accessed_time to FileMetadata
             else:
                 last_used = metadata.modified_time
 
             if last_used and last_used < cutoff_date:
-                aging_files.append(metadata.dict())
+                aging_files.append(metadata.model_dump())
 
         return aging_files    
\ No newline at end of file
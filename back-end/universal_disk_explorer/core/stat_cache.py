@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class StatCache:
+    """
+    Persistent map from a file to a cached string value (e.g. serialized metadata),
+    valid for as long as the file's size and modification time are unchanged.
+
+    Backed by one SQLite table in WAL mode. One row is kept per path, so a changed
+    file overwrites its stale entry; least recently used rows are evicted once the
+    table grows past max_entries. Safe to share between threads.
+
+    Puts and hit times are buffered in memory and written in batches, one
+    transaction each; call flush() to write them now and close() when done.
+    Database errors are raised as sqlite3.Error, and a batch that fails to
+    write is dropped.
+    """
+
+    # Puts between checks of the table size
+    TRIM_INTERVAL = 1000
+    # Puts or hits buffered in memory before they are written
+    FLUSH_SIZE = 1000
+
+    def __init__(self, db_path: Union[str, Path], table: str, max_entries: int = 100_000):
+        """
+        Args:
+            db_path: SQLite database file; created with its parent directory if missing
+            table: Table holding this cache's rows; one database can hold several caches
+            max_entries: Rows kept before the least recently used are evicted
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.table = table
+        self.max_entries = max_entries
+        # Lookups answered from the cache since it was opened
+        self.hits = 0
+        self._puts = 0
+        # path -> (size, mtime_ns, value, last_used) of puts not yet written
+        self._pending_puts = {}
+        # path -> time of the latest hit not yet written to last_used
+        self._hits = {}
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, value TEXT, last_used REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+
+    def get(self, path: str, file_stat: os.stat_result) -> Optional[str]:
+        """Return the cached value for a file, or None if missing or the file changed."""
+        with self._lock:
+            pending = self._pending_puts.get(path)
+            if pending is not None:
+                if pending[0] != file_stat.st_size or pending[1] != file_stat.st_mtime_ns:
+                    return None
+                self.hits += 1
+                return pending[2]
+            row = self._conn.execute(
+                f"SELECT value FROM {self.table} WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, file_stat.st_size, file_stat.st_mtime_ns)
+            ).fetchone()
+            if row is None:
+                return None
+            self.hits += 1
+            # Hits only affect eviction order, so they are written in batches
+            self._hits[path] = time.time()
+            if len(self._hits) >= self.FLUSH_SIZE:
+                self._flush()
+        return row[0]
+
+    def put(self, path: str, file_stat: os.stat_result, value: str) -> None:
+        """Store the value for a file, replacing any entry for an older version of it."""
+        with self._lock:
+            self._pending_puts[path] = (file_stat.st_size, file_stat.st_mtime_ns, value, time.time())
+            self._hits.pop(path, None)
+            if len(self._pending_puts) >= self.FLUSH_SIZE:
+                self._flush()
+
+    def flush(self) -> None:
+        """Write buffered puts and hit times to the database."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Write buffered puts and hit times in one transaction, then evict rows if
+        enough puts have accumulated. Caller holds the lock.
+        """
+        if not self._pending_puts and not self._hits:
+            return
+        puts, hits = self._pending_puts, self._hits
+        # Dropped even if the write fails; a cache that cannot be written to
+        # must not grow in memory instead
+        self._pending_puts, self._hits = {}, {}
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (path, size, mtime_ns, value, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(path, *row) for path, row in puts.items()]
+            )
+            self._conn.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE path = ?",
+                [(used, path) for path, used in hits.items()]
+            )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+        trim_due = self._puts // self.TRIM_INTERVAL != (self._puts + len(puts)) // self.TRIM_INTERVAL
+        self._puts += len(puts)
+        if trim_due:
+            self._trim()
+
+    def _trim(self) -> None:
+        """Evict the least recently used rows beyond max_entries. Caller holds the lock."""
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE path IN "
+                f"(SELECT path FROM {self.table} ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logger.debug("Evicted %d entries from cache table %s", count - self.max_entries, self.table)
+
+    def close(self) -> None:
+        """Write buffered puts and hits and close the database connection."""
+        with self._lock:
+            try:
+                self._flush()
+            finally:
+                self._conn.close()
@@ -1,170 +1,449 @@
 import ffmpeg
 import asyncio
+import json
 import logging
+import os
 import subprocess
 from pathlib import Path
-from typing import List, Optional, Dict
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Dict, Tuple
 import random
+import sqlite3
 
 from .local_video_quality_analyzer import LocalVideoQualityAnalyzer
+from .stat_cache import StatCache
 from ..models.schemas import VideoMetadata
 
+try:
+    import av  # Optional: probes containers in-process instead of spawning ffprobe
+except ImportError:
+    av = None
+
 # Use the same logger name as defined in main.py
 logger = logging.getLogger(__name__)
 
+# Limits on how much of a file ffprobe reads to find its streams; container
+# headers carry everything we read, so the defaults' deeper scan is wasted I/O
+PROBE_SIZE = '5000000'
+PROBE_ANALYZE_DURATION = '5000000'  # microseconds
+
+# Default thresholds for VideoAnalyzer.is_low_quality (can be overridden by the
+# caller); built once and read-only since every call shares them
+DEFAULT_QUALITY_THRESHOLDS = MappingProxyType({
+    "height": 480,  # Minimum height for acceptable quality
+    "bitrate": MappingProxyType({
+        240: 300_000,  # 300 kbps for 240p
+        360: 500_000,  # 500 kbps for 360p
+        480: 800_000,  # 800 kbps for 480p
+        720: 1_500_000,  # 1.5 Mbps for 720p
+        1080: 3_000_000,  # 3 Mbps for 1080p
+    }),
+    "min_bitrate": 500_000,  # Minimum bitrate for any video
+    "fps": 24,  # Minimum frames per second
+    "bytes_per_second": 100_000,  # ~800 kbps (file size / duration check)
+    "modern_codecs": frozenset({'h264', 'h265', 'vp9'}),  # Modern codecs
+    "aspect_ratio_range": (0.5, 2.5),  # Wider range to accommodate vertical videos
+    "quality_score_threshold": 40,  # Minimum quality score (0-100)
+})
+
+
+def _make_quality_check(thresholds: Mapping) -> Callable[[VideoMetadata], bool]:
+    """
+    Build VideoAnalyzer.is_low_quality's scoring for one set of thresholds.
+
+    Every threshold is read once and bound to a local of the returned function,
+    so scoring a video does no dict lookups.
+    """
+    min_height = thresholds["height"]
+    bitrate_by_height = thresholds["bitrate"]
+    default_bitrate = bitrate_by_height[480]
+    min_bitrate = thresholds["min_bitrate"]
+    min_fps = thresholds["fps"]
+    min_bytes_per_second = thresholds["bytes_per_second"]
+    modern_codecs = thresholds["modern_codecs"]
+    min_ar, max_ar = thresholds["aspect_ratio_range"]
+    score_threshold = thresholds["quality_score_threshold"]
+
+    def check(metadata: VideoMetadata) -> bool:
+        # Initialize quality score (0-100)
+        quality_score = 100
+
+        # Resolution check
+        if metadata.height and metadata.height < min_height:
+            quality_score -= 20  # Penalize for low resolution
+
+        # Bitrate check
+        if metadata.bitrate:
+            # Minimum bitrate check
+            if metadata.bitrate < min_bitrate:
+                quality_score -= 30  # Heavy penalty for very low bitrate
+            else:
+                # Resolution-specific bitrate check
+                expected_bitrate = bitrate_by_height.get(metadata.height, default_bitrate)
+                if metadata.bitrate < expected_bitrate:
+                    quality_score -= 20  # Penalize for low bitrate
+
+        # FPS check
+        if metadata.fps and metadata.fps < min_fps:
+            quality_score -= 10  # Penalize for low FPS
+
+        # File size vs. duration
+        if metadata.duration and metadata.file_size:
+            bytes_per_second = metadata.file_size / metadata.duration
+            if bytes_per_second < min_bytes_per_second:
+                quality_score -= 20  # Penalize for low bytes per second
+
+        # Codec check
+        if metadata.codec and metadata.codec.lower() not in modern_codecs:
+            quality_score -= 10  # Penalize for outdated codec
+
+        # Aspect ratio check
+        if metadata.width and metadata.height:
+            aspect_ratio = metadata.width / metadata.height
+            if aspect_ratio < min_ar or aspect_ratio > max_ar:
+                quality_score -= 5  # Penalize for unusual aspect ratio
+
+        # Determine if video is low quality based on quality score
+        return quality_score < score_threshold
+
+    return check
+
+
+_default_quality_check = _make_quality_check(DEFAULT_QUALITY_THRESHOLDS)
+
+# Width previews are scaled down to; PNG at source resolution is much slower to
+# encode and many times larger for no visible gain at preview sizes
+SCREENSHOT_MAX_WIDTH = 640
+
+# Marks the ffmpeg hardware acceleration support as not yet checked
+_HWACCEL_UNKNOWN = object()
+
+# Cache table for analyzed video metadata; bump the version when the probe or
+# quality analysis output changes so stale results are not served
+METADATA_CACHE_TABLE = 'video_metadata_v1'
+
 class VideoAnalyzer:
-    def __init__(self, ffmpeg_path: Optional[str] = None, ffprobe_path: Optional[str] = None):
+    def __init__(
+        self,
+        ffmpeg_path: Optional[str] = None,
+        ffprobe_path: Optional[str] = None,
+        max_concurrent_videos: Optional[int] = None,
+        metadata_cache_path: Optional[str] = None,
+        full_size_screenshots: bool = False
+    ):
         """
         Initialize VideoAnalyzer with optional custom ffmpeg path
         
         Args:
             ffmpeg_path (Optional[str]): Path to ffmpeg executable. If None, uses system default
+            max_concurrent_videos (Optional[int]): Videos analyzed (quality + screenshots) at
+                once. Defaults to half the CPU count.
+            metadata_cache_path (Optional[str]): SQLite file caching analyzed metadata by
+                path, size and mtime, so unchanged videos are not re-probed on rescans.
+                If None, nothing is cached.
+            full_size_screenshots (bool): Save screenshots as PNG at the video's own
+                resolution instead of JPEG previews at most SCREENSHOT_MAX_WIDTH wide.
         """
         self.ffmpeg_path = ffmpeg_path
         self.ffprobe_path = ffprobe_path
         self.screenshot_base_dir = Path("./output/video/screenshots")
-        self.screenshot_base_dir.mkdir(parents=True, exist_ok=True)        
-
-    async def get_video_metadata(self, file_path: Path, generate_screenshots: bool = True) -> Optional[VideoMetadata]:
+        self.screenshot_base_dir.mkdir(parents=True, exist_ok=True)
+        # Resolved once so screenshot paths are absolute without a realpath per file
+        self._screenshot_base_str = os.fspath(self.screenshot_base_dir.resolve())
+        # Resolved on first use by _get_hwaccel
+        self._hwaccel = _HWACCEL_UNKNOWN
+        if full_size_screenshots:
+            self._screenshot_ext = 'png'
+            self._screenshot_output_args = []
+        else:
+            self._screenshot_ext = 'jpg'
+            self._screenshot_output_args = [
+                '-vf', f"scale='min({SCREENSHOT_MAX_WIDTH},iw)':-2:flags=fast_bilinear",
+                '-q:v', '3',  # Good JPEG quality
+            ]
+        # Bounds concurrent probes (in-process or ffprobe subprocesses)
+        self._probe_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+        # Each quality analysis decodes on its own thread and fans metrics out to a
+        # worker pool, so only a few run side by side
+        analysis_concurrency = max_concurrent_videos or max(1, (os.cpu_count() or 2) // 2)
+        self._analysis_semaphore = asyncio.Semaphore(analysis_concurrency)
+        # Concurrent analyses split the cores between their metric thread pools
+        self._analysis_workers = max(1, (os.cpu_count() or 1) // analysis_concurrency)
+        # Analyses in progress by path, shared by concurrent requests for the same file
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.metadata_cache = StatCache(metadata_cache_path, METADATA_CACHE_TABLE) if metadata_cache_path else None
+
+    def close(self) -> None:
+        """Write the metadata cache's buffered entries and close it."""
+        if self.metadata_cache is not None:
+            self.metadata_cache.close()
+
+    async def get_video_metadata(
+        self,
+        file_path: Path,
+        generate_screenshots: bool = True,
+        file_stat: Optional[os.stat_result] = None
+    ) -> Optional[VideoMetadata]:
         """
         Extract video metadata using ffmpeg and generate screenshots if required.
 
         Args:
             file_path (Path): Path to video file.
             generate_screenshots (bool): Whether to generate screenshots.
+            file_stat (Optional[os.stat_result]): Stat result of the file if already taken;
+                used to look up the metadata cache.
 
         Returns:
             Optional[VideoMetadata]: Video metadata if successful, None otherwise.
         """
+        file_path = str(file_path)
         try:
-            probe_kwargs = {}
-            if self.ffprobe_path:
-                probe_kwargs['cmd'] = self.ffprobe_path
-            probe = await asyncio.to_thread(
-                ffmpeg.probe,
-                str(file_path),
-                **probe_kwargs
-            )
-            video_info = next(s for s in probe['streams'] if s['codec_type'] == 'video')
-            format_info = probe.get('format', {})
-
-            # Extract metadata with fallbacks
-            video_metadata = VideoMetadata(
-                width=int(video_info.get('width', 0)) or None,
-                height=int(video_info.get('height', 0)) or None,
-                duration=float(format_info.get('duration', 0)) or None,
-                bitrate=int(format_info.get('bit_rate', 0)) or None,
-                codec=video_info.get('codec_name', 'unknown') or None,
-                fps=float(eval(video_info.get('r_frame_rate', '0/1'))) or None,
-                file_size=int(format_info.get('size', 0)) or None
-            )
-
-            # Check if video is low quality
-            video_metadata.is_low_quality = self.is_low_quality(video_metadata)
-            
-            analyzer = LocalVideoQualityAnalyzer(sample_interval=2, roi_coverage=0.4)
-            result = analyzer.analyze_video(str(file_path))
-            print(f"Quality: {result.category} ({result.score:.1f}/100)")
-            video_metadata.video_qauality_result = result
+            video_metadata = None
+            if self.metadata_cache is not None:
+                # The cache shares its database with the scanner's hash cache, so a
+                # lookup can wait on the scanner's writes; keep it off the event loop
+                file_stat, cached = await asyncio.to_thread(self._cache_lookup, file_path, file_stat)
+                if cached is not None:
+                    video_metadata = VideoMetadata.model_validate_json(cached)
+
+            if video_metadata is None:
+                video_metadata = await self._analyze_shared(file_path, file_stat)
 
             # Generate screenshots if required
             if generate_screenshots:
-                try:
-                    screenshots = await self.generate_screenshots(str(file_path))
-                    video_metadata.video_screenshots = screenshots
-                except Exception as e:
-                    logger.error(f"Failed to generate screenshots for {file_path}: {e}")
-                    video_metadata.video_screenshots = []
+                async with self._analysis_semaphore:
+                    try:
+                        screenshots = await self.generate_screenshots(file_path, duration=video_metadata.duration)
+                        video_metadata.video_screenshots = screenshots
+                    except Exception as e:
+                        logger.error(f"Failed to generate screenshots for {file_path}: {e}")
+                        video_metadata.video_screenshots = []
             return video_metadata
         except Exception as e:
             logger.error(f"Error extracting metadata for {file_path}: {e}")
             return None
 
-    @staticmethod
-    def is_low_quality(metadata: VideoMetadata, thresholds: Optional[Dict] = None) -> bool:
+    def _cache_lookup(
+        self, file_path: str, file_stat: Optional[os.stat_result]
+    ) -> Tuple[os.stat_result, Optional[str]]:
         """
-        Determine if video is low quality based on metadata.
+        Blocking metadata cache lookup; a database error counts as a miss.
+
+        Returns:
+            The file's stat result (taken here if not given) and the cached entry or None.
+        """
+        file_stat = file_stat or os.stat(file_path)
+        try:
+            return file_stat, self.metadata_cache.get(file_path, file_stat)
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata cache lookup failed for {file_path}: {e}")
+            return file_stat, None
+
+    async def _analyze_shared(self, file_path: str, file_stat: Optional[os.stat_result]) -> VideoMetadata:
+        """
+        Analyze a video once for all concurrent callers asking about the same path.
+
+        The first caller starts the analysis (and caches its result); later callers
+        await the same task. Each caller gets its own copy of the metadata.
 
         Args:
-            metadata (VideoMetadata): Video metadata to analyze.
-            thresholds (Optional[Dict]): Custom thresholds for quality checks.
+            file_path (str): Path to video file.
+            file_stat (Optional[os.stat_result]): Stat result for the metadata cache.
 
         Returns:
-            bool: True if video is considered low quality, False otherwise.
+            VideoMetadata: Metadata without screenshots.
         """
-        if not metadata:
-            return False
+        task = self._inflight.get(file_path)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_and_cache(file_path, file_stat))
+            self._inflight[file_path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(file_path, None))
+        # Shielded so one caller being cancelled does not cancel the others' analysis
+        video_metadata = await asyncio.shield(task)
+        return video_metadata.model_copy()
+
+    async def _analyze_and_cache(self, file_path: str, file_stat: Optional[os.stat_result]) -> VideoMetadata:
+        """Run _analyze and store the result in the metadata cache, if there is one."""
+        video_metadata = await self._analyze(file_path)
+        if self.metadata_cache is not None:
+            # Screenshots are cached as files on disk, not in the entry
+            try:
+                await asyncio.to_thread(
+                    self.metadata_cache.put,
+                    file_path, file_stat, video_metadata.model_dump_json(exclude={'video_screenshots'})
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Metadata cache write failed for {file_path}: {e}")
+        return video_metadata
 
-        # Default thresholds (can be overridden by the caller)
-        default_thresholds = {
-            "height": 480,  # Minimum height for acceptable quality
-            "bitrate": {
-                240: 300_000,  # 300 kbps for 240p
-                360: 500_000,  # 500 kbps for 360p
-                480: 800_000,  # 800 kbps for 480p
-                720: 1_500_000,  # 1.5 Mbps for 720p
-                1080: 3_000_000,  # 3 Mbps for 1080p
-            },
-            "min_bitrate": 500_000,  # Minimum bitrate for any video
-            "fps": 24,  # Minimum frames per second
-            "bytes_per_second": 100_000,  # ~800 kbps (file size / duration check)
-            "modern_codecs": {'h264', 'h265', 'vp9'},  # Modern codecs
-            "aspect_ratio_range": (0.5, 2.5),  # Wider range to accommodate vertical videos
-            "quality_score_threshold": 40,  # Minimum quality score (0-100)
-        }
+    async def _analyze(self, file_path: str) -> VideoMetadata:
+        """
+        Probe a video and run the local quality analysis on it.
 
-        # Use custom thresholds if provided, otherwise use defaults
-        thresholds = thresholds or default_thresholds
+        Args:
+            file_path (str): Path to video file.
 
-        # Initialize quality score (0-100)
-        quality_score = 100
+        Returns:
+            VideoMetadata: Metadata without screenshots.
+        """
+        async with self._probe_semaphore:
+            probe = await self._probe(file_path)
+
+        # Extract metadata with fallbacks. The probe already returns correctly typed
+        # values, so the model is built without running Pydantic validation
+        video_metadata = VideoMetadata.model_construct(**{key: value or None for key, value in probe.items()})
+
+        # Check if video is low quality
+        video_metadata.is_low_quality = self.is_low_quality(video_metadata)
+
+        async with self._analysis_semaphore:
+            # The analysis blocks on decoding, so it runs in a worker thread where
+            # other videos' analyses and the rest of the scan can overlap with it
+            analyzer = LocalVideoQualityAnalyzer(sample_interval=2, roi_coverage=0.4,
+                                                 max_workers=self._analysis_workers)
+            result = await asyncio.to_thread(analyzer.analyze_video, file_path)
+        logger.debug(f"Quality of {file_path}: {result.category} ({result.score:.1f}/100)")
+        video_metadata.video_qauality_result = result
+        return video_metadata
+
+    async def _probe(self, file_path: str) -> Dict:
+        """
+        Read the container and first video stream properties of a file.
 
-        # Resolution check
-        if metadata.height and metadata.height < thresholds["height"]:
-            quality_score -= 20  # Penalize for low resolution
+        Uses PyAV in-process when it is installed, which avoids spawning an
+        ffprobe process per video; falls back to ffprobe otherwise or when PyAV
+        cannot open the file. The ffprobe process is awaited directly rather than
+        from a worker thread, so slow probes do not hold threads in the pool.
 
-        # Bitrate check
-        if metadata.bitrate:
-            # Minimum bitrate check
-            if metadata.bitrate < thresholds["min_bitrate"]:
-                quality_score -= 30  # Heavy penalty for very low bitrate
-            else:
-                # Resolution-specific bitrate check
-                expected_bitrate = thresholds["bitrate"].get(metadata.height, thresholds["bitrate"][480])
-                if metadata.bitrate < expected_bitrate:
-                    quality_score -= 20  # Penalize for low bitrate
+        Args:
+            file_path (str): Path to video file.
 
-        # FPS check
-        if metadata.fps and metadata.fps < thresholds["fps"]:
-            quality_score -= 10  # Penalize for low FPS
+        Returns:
+            Dict: width, height, duration, bitrate, codec, fps and file_size; missing
+            values are 0 or empty.
+        """
+        if av is not None:
+            try:
+                return await asyncio.to_thread(self._probe_av, file_path)
+            except av.error.FFmpegError as e:
+                logger.debug("PyAV could not probe %s, falling back to ffprobe: %s", file_path, e)
+        return await self._probe_ffprobe(file_path)
 
-        # File size vs. duration
-        if metadata.duration and metadata.file_size:
-            bytes_per_second = metadata.file_size / metadata.duration
-            if bytes_per_second < thresholds["bytes_per_second"]:
-                quality_score -= 20  # Penalize for low bytes per second
+    @staticmethod
+    def _probe_av(file_path: str) -> Dict:
+        """
+        Probe a video with PyAV. See _probe.
 
-        # Codec check
-        if metadata.codec and metadata.codec.lower() not in thresholds["modern_codecs"]:
-            quality_score -= 10  # Penalize for outdated codec
+        Raises:
+            IndexError: If the file has no video stream.
+        """
+        with av.open(file_path) as container:
+            stream = container.streams.video[0]
+            codec_context = stream.codec_context
+            # base_rate is the stream's r_frame_rate, as reported by ffprobe
+            rate = stream.base_rate or stream.average_rate
+            return {
+                'width': codec_context.width,
+                'height': codec_context.height,
+                'duration': container.duration / av.time_base if container.duration else 0,
+                'bitrate': container.bit_rate,
+                'codec': codec_context.name,
+                'fps': float(rate) if rate else 0,
+                'file_size': os.path.getsize(file_path),
+            }
+
+    async def _probe_ffprobe(self, file_path: str) -> Dict:
+        """
+        Probe a video by running ffprobe. See _probe.
 
-        # Aspect ratio check
-        if metadata.width and metadata.height:
-            aspect_ratio = metadata.width / metadata.height
-            min_ar, max_ar = thresholds["aspect_ratio_range"]
-            if aspect_ratio < min_ar or aspect_ratio > max_ar:
-                quality_score -= 5  # Penalize for unusual aspect ratio
+        Raises:
+            ffmpeg.Error: If ffprobe fails.
+            ValueError: If the file has no video stream.
+        """
+        cmd = [
+            self.ffprobe_path or 'ffprobe',
+            '-v', 'error',
+            '-threads', '0',
+            '-probesize', PROBE_SIZE,
+            '-analyzeduration', PROBE_ANALYZE_DURATION,
+            '-print_format', 'json',
+            '-show_format',
+            '-show_streams',
+            file_path
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise ffmpeg.Error('ffprobe', stdout, stderr)
+        probe = json.loads(stdout)
+
+        video_info = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        if video_info is None:
+            raise ValueError(f"No video stream in {file_path}")
+        format_info = probe.get('format', {})
+        return {
+            'width': int(video_info.get('width', 0)),
+            'height': int(video_info.get('height', 0)),
+            'duration': float(format_info.get('duration', 0)),
+            'bitrate': int(format_info.get('bit_rate', 0)),
+            'codec': video_info.get('codec_name', 'unknown'),
+            'fps': self._parse_frame_rate(video_info.get('r_frame_rate', '0/1')),
+            'file_size': int(format_info.get('size', 0)),
+        }
 
-        # Determine if video is low quality based on quality score
-        return quality_score < thresholds["quality_score_threshold"]
+    @staticmethod
+    def _parse_frame_rate(rate: str) -> float:
+        """
+        Parse an ffprobe frame rate such as '30000/1001' or '25'.
+
+        Args:
+            rate (str): Rational or plain frame rate string.
+
+        Returns:
+            float: Frames per second, or 0.0 if the rate is missing or invalid.
+        """
+        num, _, den = str(rate).partition('/')
+        try:
+            num = float(num)
+            den = float(den) if den else 1.0
+        except ValueError:
+            return 0.0
+        return num / den if den else 0.0
+
+    @staticmethod
+    def is_low_quality(metadata: VideoMetadata, thresholds: Optional[Dict] = None) -> bool:
+        """
+        Determine if video is low quality based on metadata.
+
+        Args:
+            metadata (VideoMetadata): Video metadata to analyze.
+            thresholds (Optional[Dict]): Custom thresholds for quality checks.
+
+        Returns:
+            bool: True if video is considered low quality, False otherwise.
+        """
+        if not metadata:
+            return False
+
+        # Use custom thresholds if provided, otherwise use defaults
+        check = _make_quality_check(thresholds) if thresholds else _default_quality_check
+        return check(metadata)
     
     async def _get_video_duration(self, video_path: str) -> float:
         """
         Get the duration of a video in seconds using ffprobe.
         """
         cmd = [
-            self.ffprobe_path,  # Use ffprobe instead of ffmpeg
+            self.ffprobe_path or 'ffprobe',  # Use ffprobe instead of ffmpeg
             '-v', 'error',       # Suppress unnecessary output
+            '-threads', '0',
+            '-probesize', '1000000',  # Duration comes from the container header
+            '-analyzeduration', '1000000',
+            '-select_streams', 'v:0',
             '-show_entries', 'format=duration',  # Extract only duration
             '-of', 'default=noprint_wrappers=1:nokey=1',  # Format output
             str(video_path)
@@ -186,72 +465,80 @@ class VideoAnalyzer:
         except ValueError:
             raise ValueError("Could not determine video duration.")
 
-    async def generate_screenshots(self, video_path: str, num_screenshots: int = 3) -> List[str]:
+    async def generate_screenshots(
+        self,
+        video_path: str,
+        num_screenshots: int = 3,
+        duration: Optional[float] = None
+    ) -> List[str]:
         """
         Generate screenshots at random timestamps from a video file.
 
         Args:
             video_path: Path to the video file
             num_screenshots: Number of screenshots to generate
+            duration: Video duration in seconds if already probed; otherwise
+                ffprobe is run to get it
 
         Returns:
             List of paths to generated screenshots. If a screenshot already exists,
             its path is returned rather than regenerating the image.
         """
         try:
-            video_path = Path(video_path)
+            video_path = os.fspath(video_path)
 
             # Create a unique directory for this video's screenshots
-            video_screenshot_dir = self.screenshot_base_dir / video_path.stem
-            video_screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-            # Get video duration
-            duration = await self._get_video_duration(str(video_path))
+            video_stem = os.path.splitext(os.path.basename(video_path))[0]
+            video_screenshot_dir = os.path.join(self._screenshot_base_str, video_stem)
+            existing = self._list_screenshot_dir(video_screenshot_dir)
 
-            if duration <= 1:
-                raise ValueError(f"Video duration ({duration}s) is too short to generate screenshots.")
+            screenshot_names = [f'screenshot_{i+1}.{self._screenshot_ext}' for i in range(num_screenshots)]
 
-            screenshots = []
-            for i in range(num_screenshots):
-                # Determine the screenshot file path
-                screenshot_path = video_screenshot_dir / f'screenshot_{i+1}.png'
-
-                # Check if the screenshot already exists. If so, use it and skip generation.
-                if screenshot_path.exists():
+            # Existing screenshots are reused rather than regenerated
+            missing = []
+            for name in screenshot_names:
+                screenshot_path = os.path.join(video_screenshot_dir, name)
+                if name in existing:
                     logger.info(f"Screenshot already exists: {screenshot_path}. Skipping generation.")
-                    screenshots.append(str(screenshot_path.resolve()))
-                    continue
-
-                # Generate a random timestamp between 1s and (duration - 1s)
-                timestamp = random.uniform(1, max(1, duration - 1))
-
-                screenshot_cmd = [
-                    self.ffmpeg_path,
-                    '-ss', str(timestamp),  # Seek to random time (before input for faster seeking)
-                    '-i', str(video_path),
-                    '-frames:v', '1',
-                    '-update', '1',  # Ensure a single image is written
-                    '-q:v', '2',     # High quality
-                    # Removed '-y' flag to prevent overwriting, since we're checking existence
-                    str(screenshot_path)
-                ]
-
-                screenshot_process = await asyncio.create_subprocess_exec(
-                    *screenshot_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-
-                _, stderr = await screenshot_process.communicate()
-
-                if screenshot_process.returncode != 0:
-                    logger.error(f"Screenshot generation failed for {screenshot_path}: {stderr.decode().strip()}")
                 else:
-                    logger.info(f"Screenshot generated: {screenshot_path}")
+                    missing.append(screenshot_path)
+
+            if missing:
+                # Get video duration unless the caller already probed it
+                if duration is None:
+                    duration = await self._get_video_duration(video_path)
+
+                if duration <= 1:
+                    raise ValueError(f"Video duration ({duration}s) is too short to generate screenshots.")
+
+                # Random timestamps between 1s and (duration - 1s)
+                timestamps = [random.uniform(1, max(1, duration - 1)) for _ in missing]
+                hwaccel = await self._get_hwaccel()
+                returncode, stderr = await self._run_screenshot_cmd(video_path, timestamps, missing, hwaccel)
+                if returncode != 0 and hwaccel:
+                    # Hardware decoders reject some codecs/profiles; retry in software
+                    logger.debug(f"Hardware-accelerated screenshots failed for {video_path}, retrying: {stderr}")
+                    # ffmpeg runs with -n, so only retry the outputs the failed run didn't write
+                    existing = self._list_screenshot_dir(video_screenshot_dir)
+                    retry = [(timestamp, path) for timestamp, path in zip(timestamps, missing)
+                             if os.path.basename(path) not in existing]
+                    if retry:
+                        returncode, stderr = await self._run_screenshot_cmd(
+                            video_path, [timestamp for timestamp, _ in retry], [path for _, path in retry], None
+                        )
+
+                if returncode != 0:
+                    logger.error(f"Screenshot generation failed for {video_path}: {stderr}")
+                else:
+                    logger.info(f"Screenshots generated for {video_path}: {len(missing)}")
+                existing = self._list_screenshot_dir(video_screenshot_dir)
 
-                # After attempting generation, add the screenshot path if it exists.
-                if screenshot_path.exists():
-                    screenshots.append(str(screenshot_path.resolve()))
+            # After attempting generation, add the screenshot paths that exist.
+            screenshots = []
+            for name in screenshot_names:
+                screenshot_path = os.path.join(video_screenshot_dir, name)
+                if name in existing:
+                    screenshots.append(screenshot_path)
                 else:
                     logger.error(f"Screenshot not created: {screenshot_path}")
 
@@ -261,68 +548,83 @@ class VideoAnalyzer:
             logger.error(f"Error generating screenshots: {e}")
             return []
 
-    # async def generate_screenshots(self, video_path: str, num_screenshots: int = 3) -> List[str]:
-    #     """
-    #     Generate screenshots at random timestamps from a video file.
-
-    #     Args:
-    #         video_path: Path to the video file
-    #         num_screenshots: Number of screenshots to generate
-
-    #     Returns:
-    #         List of paths to generated screenshots
-    #     """
-    #     try:
-    #         video_path = Path(video_path)
-
-    #         # Create a unique directory for this video's screenshots
-    #         video_screenshot_dir = self.screenshot_base_dir / video_path.stem
-    #         video_screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-    #         # Get video duration
-    #         duration = await self._get_video_duration(str(video_path))
-
-    #         if duration <= 1:
-    #             raise ValueError(f"Video duration ({duration}s) is too short to generate screenshots.")
-
-    #         screenshots = []
-    #         for i in range(num_screenshots):
-    #             # Generate a random timestamp between 1s and (duration - 1s)
-    #             timestamp = random.uniform(1, max(1, duration - 1))
-
-    #             screenshot_path = video_screenshot_dir / f'screenshot_{i+1}.png'
-
-    #             screenshot_cmd = [
-    #                 self.ffmpeg_path,
-    #                 '-ss', str(timestamp),  # Seek to random time (before input for faster seeking)
-    #                 '-i', str(video_path),
-    #                 '-frames:v', '1',
-    #                 '-update', '1',  # Ensure a single image is written
-    #                 '-q:v', '2',  # High quality
-    #                 '-y',  # Overwrite if exists
-    #                 str(screenshot_path)
-    #             ]
-
-    #             screenshot_process = await asyncio.create_subprocess_exec(
-    #                 *screenshot_cmd,
-    #                 stdout=subprocess.PIPE,
-    #                 stderr=subprocess.PIPE
-    #             )
-
-    #             _, stderr = await screenshot_process.communicate()
-
-    #             if screenshot_process.returncode != 0:
-    #                 logger.error(f"Screenshot generation failed for {screenshot_path}: {stderr.decode().strip()}")
-    #             else:
-    #                 logger.info(f"Screenshot generated: {screenshot_path}")
-
-    #             if screenshot_path.exists():
-    #                 screenshots.append(str(screenshot_path.resolve()))  # Convert to absolute path
-    #             else:
-    #                 logger.error(f"Screenshot not created: {screenshot_path}")
-
-    #         return screenshots
-
-    #     except Exception as e:
-    #         logger.error(f"Error generating screenshots: {e}")
-    #         return []
\ No newline at end of file
+    async def _run_screenshot_cmd(
+        self,
+        video_path: str,
+        timestamps: List[float],
+        screenshot_paths: List[str],
+        hwaccel: Optional[str]
+    ) -> Tuple[int, str]:
+        """
+        Run one ffmpeg process writing a screenshot per timestamp.
+
+        Each screenshot is a separate input seeked to its own timestamp, so every
+        seek stays a fast keyframe seek instead of a linear decode.
+
+        Args:
+            video_path: Path to the video file
+            timestamps: Seek position in seconds of each screenshot
+            screenshot_paths: Output file of each screenshot
+            hwaccel: ffmpeg -hwaccel method to decode with, or None for software
+
+        Returns:
+            ffmpeg's return code and stderr output
+        """
+        screenshot_cmd = [self.ffmpeg_path or 'ffmpeg', '-nostdin', '-n']
+        for timestamp in timestamps:
+            if hwaccel:
+                screenshot_cmd += ['-hwaccel', hwaccel]
+            screenshot_cmd += ['-ss', str(timestamp), '-i', video_path]
+        for input_index, screenshot_path in enumerate(screenshot_paths):
+            screenshot_cmd += [
+                '-map', f'{input_index}:v:0',
+                '-frames:v', '1',
+                '-update', '1',  # Ensure a single image is written
+                *self._screenshot_output_args,
+                screenshot_path
+            ]
+
+        screenshot_process = await asyncio.create_subprocess_exec(
+            *screenshot_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        _, stderr = await screenshot_process.communicate()
+        return screenshot_process.returncode, stderr.decode(errors='replace').strip()
+
+    async def _get_hwaccel(self) -> Optional[str]:
+        """
+        Hardware decoding method for screenshots: 'auto' if this ffmpeg build lists
+        any hardware acceleration methods, None otherwise. Checked once and cached.
+        """
+        if self._hwaccel is _HWACCEL_UNKNOWN:
+            hwaccel = None
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.ffmpeg_path or 'ffmpeg', '-hide_banner', '-hwaccels',
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+                stdout, _ = await process.communicate()
+                # First line is the "Hardware acceleration methods:" header
+                methods = [line.strip() for line in stdout.decode(errors='replace').splitlines()[1:]]
+                if process.returncode == 0 and any(methods):
+                    hwaccel = 'auto'
+            except OSError as e:
+                logger.debug(f"Could not list ffmpeg hardware acceleration methods: {e}")
+            self._hwaccel = hwaccel
+        return self._hwaccel
+
+    @staticmethod
+    def _list_screenshot_dir(directory: str) -> set:
+        """
+        Names of the files in a video's screenshot directory, creating it if missing.
+
+        One directory read replaces a stat per screenshot path.
+        """
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            os.makedirs(directory, exist_ok=True)
+            return set()
@@ -1,11 +1,15 @@
+import asyncio
+import atexit
 import logging
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+import logging.handlers
+import queue
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
-import json
 
 from .app_config import get_config
 from .core.scanner import FileScanner
@@ -17,19 +21,26 @@ from .models.schemas import FileMetadata
 config = get_config()  # The same cached instance will be returned
 # print(config.app_name)
 
-# Configure logging
+# Configure logging. Log calls only enqueue the formatted record; a listener
+# thread does the file and console writes, so they never block the event loop
+log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.FileHandler('app.log'),
+    logging.StreamHandler()
+)
+log_listener.start()
+atexit.register(log_listener.stop)  # Flushes queued records on shutdown
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="Disk Explorer")
+# Responses are encoded with orjson, which also handles datetime natively
+app = FastAPI(title="Disk Explorer", default_response_class=ORJSONResponse)
 
 # Allow requests from Tauri frontend (example: http://localhost:1420)
 origins = [
@@ -44,12 +55,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-video_analyzer = VideoAnalyzer(config.FFMPEG_PATH, config.FFPROBE_PATH)
+# Result listings repeat the same paths and MIME types and compress many times
+# over; a moderate level keeps compression cheap next to the transfer it saves
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+video_analyzer = VideoAnalyzer(
+    config.FFMPEG_PATH,
+    config.FFPROBE_PATH,
+    config.VIDEO_CONCURRENCY,
+    metadata_cache_path="./output/cache.sqlite"
+)
 scanner = FileScanner(
     progress_file="./output/progress.json",
-    result_file="./output/results.json",
-    max_workers=2  # Optional: customize number of workers
+    result_file="./output/results.jsonl",
+    video_analyzer=video_analyzer,
+    max_hash_bytes=config.MAX_HASH_BYTES,
+    hash_cache_path="./output/cache.sqlite",
+    hash_cache_max_entries=config.HASH_CACHE_MAX_ENTRIES
 )
+# Writes the caches' buffered entries on shutdown
+atexit.register(video_analyzer.close)
+atexit.register(scanner.close)
 file_ops = FileOperations()
 
 
@@ -65,17 +91,97 @@ async def global_exception_handler(request: Request, exc: Exception):
 def read_root():
     return {"message": "Running..!"}
 
+# Scans and searches run one at a time from this queue, since they share the
+# scanner's progress and result file; a full queue rejects new jobs instead of
+# piling them up
+SCAN_QUEUE_SIZE = 8
+_scan_queue: Optional[asyncio.Queue] = None
+_scan_worker: Optional[asyncio.Task] = None
+# Result file of each queued, not yet started job by its options, so a repeated
+# request joins the queued job instead of adding a copy of it
+_pending_scans: Dict[tuple, Path] = {}
+
+async def _run_scan(
+    result_file: Path,
+    path: str,
+    exclude_dirs: Optional[List[str]],
+    include_hash: bool,
+    batch_size: int,
+    generate_video_screenshots: bool
+):
+    """Run one scan, appending its results to result_file in batches."""
+    results = []
+    async for metadata in scanner.scan_directory(
+        path,
+        exclude_dirs=set(exclude_dirs) if exclude_dirs else {'.git', 'node_modules', 'venv'},
+        exclude_patterns={'.DS_Store', '*.tmp', '*.log', 'thumbs.db'},                
+        include_hash=include_hash,
+        generate_video_screenshots=generate_video_screenshots,
+        result_file=result_file,
+        report_progress=True
+    ):
+        results.append(metadata)
+        if len(results) >= batch_size:
+            # File writes run off the event loop so requests are not stalled
+            await asyncio.to_thread(scanner.write_results, results, result_file, append=True)
+            results = []
+            
+    if results:  # Write any remaining results
+        await asyncio.to_thread(scanner.write_results, results, result_file, append=True)
+
+async def _run_search(result_file: Path, path: str, filters: dict):
+    """Run one filtered search, writing its matches to result_file when it finishes."""
+    await scanner.search_directory_with_filters(path, result_file, report_progress=True, **filters)
+
+async def _scan_worker_loop():
+    """Run queued scans and searches one after another for the lifetime of the app."""
+    while True:
+        key, run, result_file, args = await _scan_queue.get()
+        _pending_scans.pop(key, None)
+        try:
+            # /progress and /results follow the running job; its own writes use
+            # result_file directly so other requests cannot redirect them
+            scanner.result_file = result_file
+            await run(result_file, *args)
+        except Exception as e:
+            logger.error(f"Scan failed: {str(e)}", exc_info=True)
+            scanner._last_error = str(e)
+            scanner.update_progress()
+        finally:
+            _scan_queue.task_done()
+
+def _queue_scan(key: tuple, file_prefix: str, run, *args) -> Path:
+    """
+    Queue run(result_file, *args) on the scan worker, or join the queued job with
+    the same key, and return the job's result file.
+    """
+    global _scan_queue, _scan_worker
+    if _scan_worker is None:
+        _scan_queue = asyncio.Queue(maxsize=SCAN_QUEUE_SIZE)
+        _scan_worker = asyncio.create_task(_scan_worker_loop())
+
+    result_file = _pending_scans.get(key)
+    if result_file is None:
+        # Generate a unique result file name for this job
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        result_file = Path(f"./output/{file_prefix}-{timestamp}.jsonl")
+        try:
+            _scan_queue.put_nowait((key, run, result_file, args))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=429, detail="Too many scans queued, try again later")
+        _pending_scans[key] = result_file
+    return result_file
+
 @app.get("/scan/{path:path}")
 async def scan_directory(
     path: str,
-    background_tasks: BackgroundTasks,
     exclude_dirs: Optional[List[str]] = Query(default=None),
     include_hash: bool = Query(default=True),
     batch_size: int = Query(default=100, gt=0, le=1000),
     generate_video_screenshots: bool = Query(default=False)
 ):
     """
-    Start scanning directory in the background with configurable options.
+    Queue a directory scan with configurable options; scans run one at a time.
     
     Args:
         path: Directory path to scan
@@ -84,37 +190,16 @@ async def scan_directory(
         batch_size: Number of files to process before writing results
         generate_video_screenshots: Whether to generate screenshots for video files
     """
-    async def scan_task():
-        results = []
-        try:
-            # Generate a unique result file name for this scan
-            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-            scanner.result_file = Path(f"./output/results-{timestamp}.json")
-            async for metadata in scanner.scan_directory(
-                path,
-                exclude_dirs=set(exclude_dirs) if exclude_dirs else {'.git', 'node_modules', 'venv'},
-                exclude_patterns={'.DS_Store', '*.tmp', '*.log', 'thumbs.db'},                
-                include_hash=include_hash,
-                generate_video_screenshots=generate_video_screenshots
-            ):
-                results.append(metadata.dict())
-                if len(results) >= batch_size:
-                    scanner.write_results(results, append=True)
-                    results = []
-                    
-            if results:  # Write any remaining results
-                scanner.write_results(results, append=True)
-                
-        except Exception as e:
-            logger.error(f"Scan failed: {str(e)}", exc_info=True)
-            scanner._last_error = str(e)
-            scanner.update_progress()
-            
-    background_tasks.add_task(scan_task)
+    key = ('scan', path, tuple(sorted(exclude_dirs)) if exclude_dirs else None, include_hash, batch_size, generate_video_screenshots)
+    result_file = _queue_scan(
+        key, "results", _run_scan, path, exclude_dirs, include_hash, batch_size, generate_video_screenshots
+    )
+
     return {
         "message": "Scan started",
+        "queued_scans": _scan_queue.qsize(),
         "status_endpoint": "/progress",
-        "results_endpoint": f"/history/{scanner.result_file.name}"
+        "results_endpoint": f"/history/{result_file.name}"
     }
 
 
@@ -123,19 +208,29 @@ async def get_progress():
     """Return current progress."""
     return scanner.get_progress()
 
+def _stream_results(result_file: Path, ndjson: bool = False) -> Response:
+    """
+    Send a result file as a JSON array without decoding and re-encoding its records,
+    or with ndjson=True as the stored JSON Lines file itself, one record per line.
+    """
+    if ndjson and result_file.suffix == '.jsonl':
+        return FileResponse(result_file, media_type="application/x-ndjson")
+    # Starlette iterates the sync generator in its thread pool
+    return StreamingResponse(scanner.iter_results_json(result_file), media_type="application/json")
+
 @app.get("/results")
-async def get_results():
+async def get_results(
+    ndjson: bool = Query(default=False, description="Return newline-delimited JSON records instead of an array")
+):
     """Return completed scan results."""
     result_file = Path(scanner.result_file)
     if result_file.exists():
-        with open(result_file, 'r') as f:
-            return json.load(f)
+        return _stream_results(result_file, ndjson)
     return {"message": "No results available yet."}
 
 @app.get("/search/{path:path}")
 async def search_files(
     path: str,
-    background_tasks: BackgroundTasks,
     min_size: Optional[int] = Query(default=None, description="Minimum file size in bytes"),
     max_size: Optional[int] = Query(default=None, description="Maximum file size in bytes"),
     file_types: Optional[str] = Query(default=None, description="Comma-separated list of file extensions (e.g., mp4,jpg,pdf)"),
@@ -154,15 +249,7 @@ async def search_files(
     created_before_date = datetime.fromisoformat(created_before) if created_before else None
     modified_before_date = datetime.fromisoformat(modified_before) if modified_before else None
 
-    # Generate a unique result file name for this search
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    scanner.result_file = Path(f"./output/search_results-{timestamp}.json")
-
-    # Start the background task
-    background_tasks.add_task(
-        scanner.search_directory_with_filters,
-        path,
-        scanner.result_file,
+    filters = dict(
         min_size=min_size,
         max_size=max_size,
         file_types=file_types_list,
@@ -173,30 +260,43 @@ async def search_files(
         include_duplicates=include_duplicates,
         preview_image=preview_image
     )
+    # Searches share the scan queue, so /progress and /results follow them too
+    key = ('search', path, *(tuple(value) if isinstance(value, list) else value for value in filters.values()))
+    result_file = _queue_scan(key, "search_results", _run_search, path, filters)
 
     return {
         "message": "Search started",
-        "status_endpoint": "/search/progress",
-        "results_endpoint": f"/history/{scanner.result_file.name}"
+        "queued_scans": _scan_queue.qsize(),
+        "status_endpoint": "/progress",
+        "results_endpoint": f"/history/{result_file.name}"
     }
 
+# Last /history listing, keyed by the output directory's mtime; creating or
+# removing a result file changes it, so the listing is rebuilt only then
+_history_cache: Optional[Tuple[int, dict]] = None
+
 # New API endpoint to list all history files (both scan and search results)
 @app.get("/history")
 async def get_history():
+    global _history_cache
     output_dir = Path("./output")
-    if not output_dir.exists():
+    try:
+        dir_mtime = output_dir.stat().st_mtime_ns
+    except FileNotFoundError:
         return {"scans": [], "searches": []}
+    if _history_cache is not None and _history_cache[0] == dir_mtime:
+        return _history_cache[1]
     
     # Get most recent 10 scan result files
     scan_files = sorted(
-        list(output_dir.glob("results-*.json")),
+        list(output_dir.glob("results-*.json*")),
         key=lambda f: f.stat().st_mtime,
         reverse=True
     )[:10]
     
     # Get most recent 10 search result files
     search_files = sorted(
-        list(output_dir.glob("search_results-*.json")),
+        list(output_dir.glob("search_results-*.json*")),
         key=lambda f: f.stat().st_mtime,
         reverse=True
     )[:10]
@@ -205,20 +305,19 @@ async def get_history():
         "scans": [f.name for f in scan_files],
         "searches": [f.name for f in search_files]
     }
+    _history_cache = (dir_mtime, history)
     
     return history
 
 # New API endpoint to fetch a specific history file by name
 @app.get("/history/{filename}")
-async def get_history_file(filename: str):
+async def get_history_file(
+    filename: str,
+    ndjson: bool = Query(default=False, description="Return newline-delimited JSON records instead of an array")
+):
     file_path = Path("./output") / filename
     if file_path.exists():
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return data
-        except Exception as e:
-            raise HTTPException(status_code=500, detail="Error reading file")
+        return _stream_results(file_path, ndjson)
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
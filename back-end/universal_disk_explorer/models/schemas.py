@@ -26,10 +26,12 @@ class VideoQualityResult(BaseModel):
         score (float): Aggregated quality score (0-100).
         category (str): Quality category (e.g., High Quality, Medium Quality, Low Quality).
         details (VideoQualityDetails): Detailed metrics used to calculate the quality.
+        sampled_frames (Optional[int]): Number of frames the metrics were computed from.
     """
     score: float
     category: str
     details: VideoQualityDetails
+    sampled_frames: Optional[int] = None
 
 class VideoMetadata(BaseModel):
     width: Optional[int] = None
@@ -64,10 +66,6 @@ class ProgressModel(BaseModel):
     elapsed_time: Optional[str] = None
     estimated_time_remaining: Optional[str] = None
     files_per_second: Optional[float] = None
+    cached_hashes: Optional[int] = None  # Hashes reused from the persistent hash cache
     error: Optional[str] = None
-
-    # Ensure JSON serialization works correctly
-    def model_dump(self, **kwargs):
-        """Override model_dump to ensure compatibility with JSON serialization"""
-        return super().model_dump(mode='json', **kwargs)
     
\ No newline at end of file